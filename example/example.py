@@ -26,8 +26,9 @@ sep = core.StaticWidget(' << ')
 # clock widget
 def clock_f():
     return time.strftime('%a, %d %b %Y, %H:%M:%S')
-clock_w = core.Widget(60,      # timeout
-                      clock_f) # function which result should be send to dzen
+clock_w = core.Widget(60,          # timeout
+                      clock_f,     # function which result should be send to dzen
+                      priority=0)  # refresh before other widgets
 
 # alsa widget
 def vol_f(volume, muted):
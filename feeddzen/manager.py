@@ -14,13 +14,27 @@ class Manager:
 
     :param widgets: a list of widgets to display in dzen
     :param dzen_command: a command to invoke dzen
+    :param recorder: an optional `trace.TraceRecorder` to record every
+     frame sent to dzen
+    :param budget: seconds available for refreshing widgets before
+     each frame is sent to dzen, `None` means no limit. Widgets which
+     don't fit are deferred to the next frame, see `utils.ContScheduler`.
+    :param timefunc: a function returning the current time
+    :param delayfunc: a function to wait given number of seconds
     """
 
-    def __init__(self, widgets=[], dzen_command='dzen2'):
-        self._scheduler = utils.ContScheduler(time.time, time.sleep)
+    def __init__(self, widgets=[], dzen_command='dzen2', recorder=None,
+                 budget=None, timefunc=time.time, delayfunc=time.sleep):
+        self._scheduler = utils.ContScheduler(
+            timefunc, delayfunc, budget=budget,
+            frame_action=self._print_status_bar)
         self.widgets = widgets
+        self._recorder = recorder
+        # The last output of every widget.
+        self._texts = [None] * len(widgets)
+        # Widgets refreshed since the last frame, used only for recording.
+        self._refreshed = []
         self._init_dzen(dzen_command)
-        self._init_events()
 
     def _init_dzen(self, dzen_command):
         """Create dzen process and set up its standard input."""
@@ -31,26 +45,55 @@ class Manager:
     def _init_events(self):
         """Add events to the scheduler.
 
-        Basically only one event is added several times with different
-        timeout.
+        One event is added for each widget with its timeout, priority
+        and cost.
 
         If timeout is reached it means particular widget should
-        be updated and new data send to dzen. But this requires also
-        to print all widgets, whose output is already cached, to get
-        complete line for dzen.
+        be updated. When all due widgets are updated new data is sent
+        to dzen together with output of other widgets, which is already
+        cached, to get complete line for dzen.
         """
-        for widget in self.widgets:
+        for index, widget in enumerate(self.widgets):
             # `StaticWidget`s don't need to be updated.
             if not isinstance(widget, StaticWidget):
                 self._scheduler.enter(
-                    widget.timeout, 1, self._print_status_bar, ())
+                    widget.timeout, widget.priority, self._refresh_widget,
+                    (index,), widget.cost)
+
+    def _refresh_widget(self, index):
+        """Get and store output of the widget at `index`."""
+        widget = self.widgets[index]
+        # The widget is due, so its cached output must not be reused
+        # even if it was cached a moment less than its timeout ago.
+        if not isinstance(widget, StaticWidget):
+            widget.expire()
+        if self._recorder is None:
+            self._texts[index] = str(widget)
+            return
+        timefunc = self._scheduler.timefunc
+        start = timefunc()
+        text = str(widget)
+        # `StaticWidget`s are recorded only for their text.
+        if isinstance(widget, StaticWidget):
+            latency = None
+        else:
+            latency = timefunc() - start
+        changed = text != self._texts[index]
+        self._texts[index] = text
+        self._refreshed.append((index, latency, text if changed else None))
 
     def _print_status_bar(self):
         """Send all widgets' output to dzen's stdin."""
-        status_bar = ''.join(str(w) for w in self.widgets) + '\n'
-        self._dzen_stdin.write(bytes(status_bar.encode('utf-8')))
+        self._dzen_stdin.write(utils.format_status_bar(self._texts))
+        if self._recorder is not None:
+            self._recorder.record(self._scheduler.timefunc(),
+                                  self._refreshed)
+            self._refreshed = []
 
     def start(self):
         """Run scheduler and start sending data to dzen."""
+        for index in range(len(self.widgets)):
+            self._refresh_widget(index)
         self._print_status_bar()
+        self._init_events()
         self._scheduler.run()
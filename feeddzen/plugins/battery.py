@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
 import re
 import datetime
 
@@ -57,12 +58,14 @@ class BatteryWidget(BaseWidget):
     _rx_energy_full = re.compile(r'POWER_SUPPLY_ENERGY_FULL=(\d+)')
     _rx_energy_now = re.compile(r'POWER_SUPPLY_ENERGY_NOW=(\d+)')
     _rx_current_now = re.compile(r'POWER_SUPPLY_CURRENT_NOW=(\d+)')
+    # POWER_NOW is in µW, some batteries report it instead of CURRENT_NOW.
+    _rx_power_now = re.compile(r'POWER_SUPPLY_POWER_NOW=(\d+)')
     _rx_voltage_now = re.compile(r'POWER_SUPPLY_VOLTAGE_NOW=(\d+)')
     _rx_status = re.compile(r'POWER_SUPPLY_STATUS=(\w+)')
 
     def __init__(self, timeout, func, bat_name='BAT0', full_design=True,
-                 time_as_string=True):
-        super().__init__(timeout, func)
+                 time_as_string=True, priority=1, cost=0):
+        super().__init__(timeout, func, priority, cost)
         self.bat_name = bat_name
         self.full_design = full_design
         self.time_as_string = time_as_string
@@ -225,3 +228,214 @@ class BatteryWidget(BaseWidget):
 
     def __str__(self):
         return self.update()
+
+
+class PowerSupplyIndex:
+    """Index of batteries and AC adapters found in
+    ``/sys/class/power_supply``.
+
+    Types of the devices are read only once and the result is cached.
+    On each read the directory's entries are listed and compared with
+    the cached ones, so the index is rebuilt only when a battery or
+    an adapter is added or removed. `hotplug` forces rebuilding it
+    on next read.
+
+    :param path: directory with power supplies.
+    """
+
+    _power_supply_path = '/sys/class/power_supply'
+
+    def __init__(self, path=None):
+        self.path = path or self._power_supply_path
+        self._index = None
+        self._names = None
+
+    def hotplug(self):
+        """Forget the index, it is built again on next read."""
+        self._index = None
+
+    def _read_file(self, name, file_name):
+        with open(os.path.join(self.path, name, file_name)) as file_obj:
+            return file_obj.read()
+
+    def _get_index(self):
+        """Return a tuple - (battery names, adapter names)."""
+        try:
+            names = sorted(os.listdir(self.path))
+        except OSError:
+            names = []
+        if self._index is None or names != self._names:
+            batteries = []
+            adapters = []
+            for name in names:
+                try:
+                    supply_type = self._read_file(name, 'type').strip()
+                except IOError:
+                    continue
+                if supply_type == 'Battery':
+                    batteries.append(name)
+                elif supply_type == 'Mains':
+                    adapters.append(name)
+            self._index = (batteries, adapters)
+            self._names = names
+        return self._index
+
+    @property
+    def batteries(self):
+        return self._get_index()[0]
+
+    @property
+    def adapters(self):
+        return self._get_index()[1]
+
+    def read(self):
+        """Read all batteries and adapters in one pass.
+
+        A tuple - (list of batteries' *uevent* contents, list of
+        adapters' online states as booleans) is returned.
+
+        :raises IOError: if a device disappeared also after rebuilding
+         the index.
+        """
+        try:
+            return self._read()
+        except IOError:
+            self.hotplug()
+            return self._read()
+
+    def _read(self):
+        batteries, adapters = self._get_index()
+        uevents = [self._read_file(name, 'uevent') for name in batteries]
+        online = [self._read_file(name, 'online').strip() == '1'
+                  for name in adapters]
+        return uevents, online
+
+
+class MultiBatteryWidget(BatteryWidget):
+    """Widget combining all batteries, e.g. *BAT0* and *BAT1*.
+
+    Batteries and AC adapters are found by `PowerSupplyIndex`.
+
+    Arguments which will be passed to the function are the same as in
+    `BatteryWidget` but computed for all batteries together. The
+    dictionary has also keys:
+
+    - `'rate'` - combined charge or discharge rate in watts, `None` if
+      a battery in the combined state doesn't report its power or current,
+    - `'batteries'` - the number of present batteries,
+    - `'ac'` - `True` if an AC adapter is online, `False` if not and
+      `None` if there are no adapters.
+
+    The state is *charging* if any battery is charging, otherwise
+    *discharging* if any battery is discharging, *full* if all of them
+    are full and *unknown* in other cases. Time keys are passed only
+    if the rate is known.
+
+    :param power_supply: a `PowerSupplyIndex` instance, a new one is
+     created by default.
+    """
+
+    def __init__(self, timeout, func, full_design=True, time_as_string=True,
+                 priority=1, cost=0, power_supply=None):
+        self.power_supply = power_supply or PowerSupplyIndex()
+        super().__init__(timeout, func, None, full_design, time_as_string,
+                         priority, cost)
+
+    def _get_energy(self, matches, key):
+        """Return energy in µWh for `key` - *now*, *full* or *full_design*.
+
+        CHARGE_* values are converted using VOLTAGE_NOW.
+        `None` is returned if the value is not available.
+        """
+        energy = matches['energy_{}'.format(key)]
+        charge = matches['charge_{}'.format(key)]
+        if energy is None and charge is not None \
+                and matches['voltage_now']:
+            # µAh * µV = 10^-6 µWh
+            energy = charge * matches['voltage_now'] / 10**6
+        return energy
+
+    def _get_power(self, matches):
+        """Return power in µW or `None` if it is not available."""
+        if matches['power_now'] is not None:
+            return matches['power_now']
+        if matches['current_now'] is not None and matches['voltage_now']:
+            return matches['current_now'] * matches['voltage_now'] / 10**6
+        return None
+
+    def _combine(self, all_matches):
+        """Return a tuple - (state, percentage, remaining seconds, rate).
+
+        :param all_matches: a list of dictionaries returned by
+         `_get_all_matches`, one for each battery.
+        """
+        full = 'full_design' if self.full_design else 'full'
+        statuses = [(m['status'] or 'Unknown').lower() for m in all_matches]
+        if 'charging' in statuses:
+            state = 'charging'
+        elif 'discharging' in statuses:
+            state = 'discharging'
+        elif all(status == 'full' for status in statuses):
+            state = 'full'
+        else:
+            state = 'unknown'
+        energy_now = sum(self._get_energy(m, 'now') for m in all_matches)
+        energy_full = sum(self._get_energy(m, full) or 0
+                          for m in all_matches)
+        percentage = round(energy_now / energy_full * 100.0, 2) \
+            if energy_full else None
+        # Only batteries in the combined state contribute to the rate.
+        powers = [self._get_power(m)
+                  for m, status in zip(all_matches, statuses)
+                  if status == state]
+        if not powers or None in powers:
+            power = None
+        else:
+            power = sum(powers)
+        remaining = None
+        if power:
+            if state == 'discharging':
+                remaining = int(energy_now * 3600 / power)
+            elif state == 'charging':
+                remaining = int(max(energy_full - energy_now, 0)
+                                * 3600 / power)
+        rate = round(power / 10**6, 2) if power is not None else None
+        return state, percentage, remaining, rate
+
+    def _define_update(self):
+        @utils.memoize(self.timeout)
+        def update():
+            try:
+                uevents, online = self.power_supply.read()
+            except IOError:
+                # FIXME: Maybe some logging would be better.
+                return 'ERROR'
+            all_matches = [self._get_all_matches(s) for s in uevents]
+            # Skip batteries which are not present, e.g. an empty bay.
+            all_matches = [m for m in all_matches
+                           if self._get_energy(m, 'now') is not None]
+            if not all_matches:
+                return 'ERROR'
+            state, percentage, remaining, rate = \
+                self._combine(all_matches)
+            d = {
+                'percentage': percentage,
+                'rate': rate,
+                'batteries': len(all_matches),
+                'ac': any(online) if online else None
+            }
+            if remaining:
+                # `remaining` is combined for all batteries, so it has
+                # to be passed instead of computing it from matches.
+                remaining_time = self._get_remaining_time(None, remaining)
+                empty_time = self._get_empty_time(None, remaining)
+                d.update({
+                    'hours': remaining_time[0],
+                    'minutes': remaining_time[1],
+                    'seconds': remaining_time[2],
+                    'hour_et': empty_time[0],
+                    'minute_et': empty_time[1],
+                    'second_et': empty_time[2]
+                })
+            return self.func(state, d)
+        self.update = update
@@ -12,11 +12,27 @@ class BaseWidget:
 
     :param timeout: a number of seconds for storing the same result of `func`
     :param func: a function which result should be sent to dzen
+    :param priority: a number, widgets with lower numbers are refreshed
+     first when several of them are due at the same time
+    :param cost: expected number of seconds to refresh the widget, used
+     to defer it when the frame's budget is exhausted
+     (see `Manager`'s `budget`)
     """
 
-    def __init__(self, timeout, func):
+    def __init__(self, timeout, func, priority=1, cost=0):
         self.timeout = timeout
         self.func = func
+        self.priority = priority
+        self.cost = cost
+
+    def expire(self):
+        """Forget cached output, so the next `str` calls `func` again.
+
+        Widgets caching `update` with `utils.memoize` are handled here.
+        """
+        update = getattr(self, 'update', None)
+        if update is not None and hasattr(update, 'expire'):
+            update.expire()
 
     def __str__(self):
         raise NotImplementedError
@@ -50,8 +66,8 @@ class Widget(BaseWidget):
         clock_widget = Widget(60, clock_func)
     """
 
-    def __init__(self, timeout, func):
-        super().__init__(timeout, func)
+    def __init__(self, timeout, func, priority=1, cost=0):
+        super().__init__(timeout, func, priority, cost)
         self._define_update()
 
     def _define_update(self):
@@ -48,8 +48,8 @@ class MPDWidgetMPC(BaseWidget):
     # Regexp to capture one tag.
     _rx_delimeter = re.compile('(.*?)<>')
 
-    def __init__(self, timeout, func):
-        super().__init__(timeout, func)
+    def __init__(self, timeout, func, priority=1, cost=0):
+        super().__init__(timeout, func, priority, cost)
         self._define_update()
 
     def _define_update(self):
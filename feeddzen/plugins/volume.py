@@ -28,8 +28,9 @@ class AlsaWidget(BaseWidget):
     _rx_muted = re.compile(r'\[off\]')
 
     def __init__(self, timeout, func,
-                 mixer='Master', card='0', device='default'):
-        super().__init__(timeout, func)
+                 mixer='Master', card='0', device='default',
+                 priority=1, cost=0):
+        super().__init__(timeout, func, priority, cost)
         # Build amixer command.
         amixer_command_format = 'amixer get {mixer} -c {card} -D {device}'
         self._amixer_command = shlex.split(amixer_command_format.format(
@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Recording and replaying frames sent to dzen.
+
+A trace is an append-only binary file. It starts with a short header
+followed by one record per frame::
+
+    header:  magic (4 bytes) | version (uint8)
+    frame:   flags (uint8) | timestamp (float64) | number of entries (uint16)
+    entry:   widget index (uint16) | latency (float32) | text length (int32)
+             | text (utf-8, only if text length is not -1)
+
+An entry is written for every widget refreshed before the frame, i.e.
+all widgets in the first frame and then only those which were due.
+Its text is stored only if it differs from the previous one, otherwise
+text length is -1. Latency of a `StaticWidget`, which is never really
+refreshed, is NaN and is read as `None`.
+
+Every run of `Manager` appending to the trace is a session. The first
+frame of a session has the `_NEW_SESSION` flag set, see `split_sessions`.
+"""
+
+import math
+import struct
+from collections import namedtuple
+
+from .manager import Manager
+from .plugins.core import BaseWidget, StaticWidget
+
+
+_MAGIC = b'FDZT'
+_VERSION = 2
+_header = struct.Struct('<4sB')
+_frame = struct.Struct('<BdH')
+_entry = struct.Struct('<Hfi')
+# Frame's flags.
+_NEW_SESSION = 1
+
+Frame = namedtuple('Frame', 'time, entries, new_session')
+Frame.__new__.__defaults__ = (False,)
+Entry = namedtuple('Entry', 'index, latency, text')
+Summary = namedtuple(
+    'Summary', 'frames, duration, frames_per_minute, redundant_frames, latency')
+
+
+class TraceRecorder:
+    """Append frames to a trace file.
+
+    Pass an instance to `Manager` to record everything it sends to dzen.
+
+    :param path: path of the trace file, it is created if doesn't exist
+     and appended to otherwise. A partially written last frame, left
+     e.g. by a crash, is cut off before appending.
+    :raises ValueError: if an existing file is not a trace.
+    """
+
+    def __init__(self, path):
+        try:
+            with open(path, 'rb') as file_obj:
+                data = file_obj.read()
+        except IOError:
+            data = b''
+        # Offset where the valid part of the file ends.
+        end = 0
+        if len(data) >= _header.size:
+            end = _header.size
+            for frame, end in _read_frames(path, data):
+                pass
+        elif not _header.pack(_MAGIC, _VERSION).startswith(data):
+            raise ValueError('{} is not a trace file'.format(path))
+        self._file = open(path, 'ab')
+        if end < len(data):
+            self._file.truncate(end)
+        # Write the header only to a new (empty) file.
+        if end == 0:
+            self._file.write(_header.pack(_MAGIC, _VERSION))
+            self._file.flush()
+        self._new_session = True
+
+    def record(self, timestamp, entries):
+        """Append one frame to the trace.
+
+        :param timestamp: time when the frame was sent.
+        :param entries: a list of ``(index, latency, text)`` tuples where
+         `text` is `None` if the widget's output hasn't changed and
+         `latency` is `None` for a `StaticWidget`.
+        """
+        flags = _NEW_SESSION if self._new_session else 0
+        self._new_session = False
+        chunks = [_frame.pack(flags, timestamp, len(entries))]
+        for index, latency, text in entries:
+            if latency is None:
+                latency = float('nan')
+            if text is None:
+                chunks.append(_entry.pack(index, latency, -1))
+            else:
+                data = text.encode('utf-8')
+                chunks.append(_entry.pack(index, latency, len(data)))
+                chunks.append(data)
+        self._file.write(b''.join(chunks))
+        # Flush every frame so nothing is lost if dzen or X dies.
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _read_frames(path, data):
+    """Generate tuples - (`Frame`, offset of the frame's end) from `data`.
+
+    Reading stops at the first incomplete or corrupted frame.
+
+    :raises ValueError: if `data` is not a trace.
+    """
+    if len(data) < _header.size:
+        raise ValueError('{} is not a trace file'.format(path))
+    magic, version = _header.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError('{} is not a trace file'.format(path))
+    offset = _header.size
+    try:
+        while offset < len(data):
+            flags, timestamp, count = _frame.unpack_from(data, offset)
+            offset += _frame.size
+            entries = []
+            for n in range(count):
+                index, latency, length = _entry.unpack_from(data, offset)
+                offset += _entry.size
+                text = None
+                if length != -1:
+                    if length < 0 or offset + length > len(data):
+                        return
+                    text = data[offset:offset + length].decode('utf-8')
+                    offset += length
+                if math.isnan(latency):
+                    latency = None
+                entries.append(Entry(index, latency, text))
+            yield Frame(timestamp, entries,
+                        bool(flags & _NEW_SESSION)), offset
+    except (struct.error, UnicodeDecodeError):
+        return
+
+
+def read_trace(path):
+    """Generate `Frame`s stored in the trace file.
+
+    Each frame's `entries` is a list of `Entry` tuples.
+    A partially written last frame is ignored.
+
+    :raises ValueError: if the file is not a trace.
+    """
+    with open(path, 'rb') as file_obj:
+        data = file_obj.read()
+    for frame, end in _read_frames(path, data):
+        yield frame
+
+
+def split_sessions(frames):
+    """Generate lists of `Frame`s, one for each recorded session.
+
+    :param frames: an iterable of `Frame`s, e.g. returned by `read_trace`.
+    """
+    session = []
+    for frame in frames:
+        if frame.new_session and session:
+            yield session
+            session = []
+        session.append(frame)
+    if session:
+        yield session
+
+
+class VirtualClock:
+    """Clock whose `sleep` only moves the time forward.
+
+    Its `time` and `sleep` methods may be passed to a scheduler in place
+    of `time.time` and `time.sleep`.
+
+    :param start: initial time.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class _ReplayWidget(BaseWidget):
+    """Widget returning recorded output of one widget of a trace.
+
+    Every refresh takes the recorded latency on the clock.
+    """
+
+    def __init__(self, timeout, clock, entries, priority=1, cost=0):
+        super().__init__(timeout, None, priority, cost)
+        self._clock = clock
+        self._entries = entries
+        self._position = 0
+        self.text = ''
+
+    @property
+    def exhausted(self):
+        return self._position >= len(self._entries)
+
+    def __str__(self):
+        if not self.exhausted:
+            entry = self._entries[self._position]
+            self._position += 1
+            self._clock.sleep(entry.latency or 0)
+            if entry.text is not None:
+                self.text = entry.text
+        return self.text
+
+
+class _EndOfTrace(Exception):
+    pass
+
+
+class _ReplayManager(Manager):
+    """Manager sending the status bar to a stream instead of dzen.
+
+    It stops after every widget's recorded output is used up.
+    """
+
+    def _init_dzen(self, stream):
+        self._dzen_stdin = stream
+
+    def _print_status_bar(self):
+        super()._print_status_bar()
+        if all(widget.exhausted for widget in self.widgets
+               if isinstance(widget, _ReplayWidget)):
+            raise _EndOfTrace
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def replay(frames, stream, budget=None, priorities={}, recorder=None):
+    """Run `Manager` with widgets replaying recorded frames.
+
+    Each recorded widget is replaced with a widget which returns its
+    recorded output and takes its recorded latency. Its timeout is the
+    median interval between its recorded refreshes and its cost is the
+    median latency. Widgets refreshed only once become `StaticWidget`s.
+    The widgets are scheduled by `utils.ContScheduler` on a
+    `VirtualClock`, so the replay takes no real time and a different
+    `budget` or `priorities` may be tried out.
+
+    :param frames: an iterable of `Frame`s of one session, e.g. an item
+     generated by `split_sessions`.
+    :param stream: binary file-like object to write the status bar to.
+    :param budget: passed to `Manager`.
+    :param priorities: a dictionary mapping widget indexes to priorities,
+     1 by default.
+    :param recorder: an optional `TraceRecorder` to record the replay.
+    :returns: the scheduler used for replaying, its `timefunc` returns
+     the time of the end and `deferrals` lists deferred widgets.
+    :raises ValueError: if there are no frames or they belong to several
+     sessions.
+    """
+    sessions = list(split_sessions(frames))
+    if not sessions:
+        raise ValueError('nothing to replay')
+    if len(sessions) > 1:
+        raise ValueError('frames of {} sessions given, replay them '
+                         'one by one'.format(len(sessions)))
+    frames = sessions[0]
+    clock = VirtualClock(frames[0].time)
+    # Recorded entries and refresh times of every widget.
+    entries = {}
+    times = {}
+    for frame in frames:
+        for entry in frame.entries:
+            entries.setdefault(entry.index, []).append(entry)
+            times.setdefault(entry.index, []).append(frame.time)
+    widgets = []
+    for index in range(max(entries) + 1):
+        widget_entries = entries.get(index, [])
+        if len(widget_entries) < 2:
+            text = widget_entries[0].text if widget_entries else ''
+            widgets.append(StaticWidget(text or ''))
+            continue
+        widget_times = times[index]
+        timeout = _median(b - a for a, b in
+                          zip(widget_times, widget_times[1:]))
+        cost = _median(entry.latency or 0 for entry in widget_entries)
+        widgets.append(_ReplayWidget(timeout, clock, widget_entries,
+                                     priorities.get(index, 1), cost))
+    manager = _ReplayManager(widgets, stream, recorder, budget,
+                             clock.time, clock.sleep)
+    try:
+        manager.start()
+    except _EndOfTrace:
+        pass
+    return manager._scheduler
+
+
+def _percentile(values, percent):
+    """Return `percent` percentile of sorted `values` (nearest-rank)."""
+    rank = max(int(-(-percent * len(values) // 100)), 1)
+    return values[rank - 1]
+
+
+def summarize(frames, percentiles=(50, 90, 99, 100)):
+    """Return a `Summary` of recorded frames.
+
+    - `frames` - the number of frames,
+    - `duration` - seconds between the first and the last frame of each
+      session, summed up, so time between sessions is not counted,
+    - `frames_per_minute` - `None` if `duration` is 0,
+    - `redundant_frames` - frames which didn't change any widget's output,
+      the first frame of a session is never redundant,
+    - `latency` - a dictionary mapping percentiles to the widgets'
+      refresh latency in seconds; empty if nothing was refreshed.
+      `StaticWidget`s are not taken into account.
+
+    :param frames: an iterable of `Frame`s, e.g. returned by `read_trace`.
+    :param percentiles: percentiles of latency to compute.
+    """
+    count = 0
+    redundant = 0
+    duration = 0.0
+    latencies = []
+    for session in split_sessions(frames):
+        duration += session[-1].time - session[0].time
+        count += len(session)
+        redundant += sum(1 for frame in session[1:]
+                         if all(entry.text is None
+                                for entry in frame.entries))
+        for frame in session:
+            latencies.extend(entry.latency for entry in frame.entries
+                             if entry.latency is not None)
+    per_minute = count / duration * 60.0 if duration > 0 else None
+    latencies.sort()
+    latency = {p: _percentile(latencies, p)
+               for p in percentiles} if latencies else {}
+    return Summary(count, duration, per_minute, redundant, latency)
@@ -5,7 +5,7 @@ import functools
 import time
 import sched
 import heapq
-from collections import namedtuple
+from collections import namedtuple, deque
 
 
 class memoize:
@@ -42,15 +42,33 @@ class memoize:
                     time.time() - self._memo[1] > self._timeout:
                 self._memo = (func(*args, **kwds), time.time())
             return self._memo[0]
+        wrapper.expire = self.expire
         return wrapper
 
+    def expire(self):
+        """Forget the cached value, the next call invokes the function."""
+        self._memo = (None, None)
+
+
+def format_status_bar(texts):
+    """Join widgets' output into one line ready to be sent to dzen.
+
+    :param texts: an iterable of strings, one for each widget.
+    :rtype: bytes
+    """
+    status_bar = ''.join(texts) + '\n'
+    return status_bar.encode('utf-8')
+
 
 class EventWithDelay(
-        namedtuple('Event', 'time, delay, priority, action, argument'),
+        namedtuple('Event', 'time, delay, priority, action, argument, cost'),
         sched.Event):
     pass
 
 
+Deferral = namedtuple('Deferral', 'time, priority, action, argument')
+
+
 class ContScheduler(sched.scheduler):
     """A scheduler which doesn't drop executed events.
 
@@ -60,10 +78,35 @@ class ContScheduler(sched.scheduler):
     This enhancement needs modifying `sched.Event` by adding
     another field - delay to compute time to run newly added event.
 
+    All events which are due at the same time make up a frame.
+    They are executed in order of priority (lower number means higher
+    priority, like in `sched.scheduler`_) and then `frame_action`
+    is called.
+    If `budget` is given then events are executed only as long as
+    the time spent in the frame plus event's expected cost fits in
+    the budget. The remaining events are deferred to the next frame
+    and each deferral is recorded in `deferrals`. At least one event
+    is executed in every frame.
+
+    :param budget: seconds available for executing events in one frame,
+     `None` means no limit.
+    :param frame_action: a function called without arguments after
+     events of a frame are executed.
+    :param max_deferrals: the number of the most recent deferrals kept
+     in `deferrals`, `deferred` counts all of them.
+
     .. _sched.scheduler: http://docs.python.org/py3k/library/sched.html
     """
 
-    def _enterabs(self, time, delay, priority, action, argument):
+    def __init__(self, timefunc, delayfunc, budget=None, frame_action=None,
+                 max_deferrals=1000):
+        super().__init__(timefunc, delayfunc)
+        self.budget = budget
+        self.frame_action = frame_action
+        self.deferrals = deque(maxlen=max_deferrals)
+        self.deferred = 0
+
+    def _enterabs(self, time, delay, priority, action, argument, cost=0):
         """Enter a new event in the queue at the absolute time.
 
         `delay` argument should be equal `time` - `timefunc()`
@@ -71,35 +114,39 @@ class ContScheduler(sched.scheduler):
         Returns an ID for the event which can be used to remove it,
         if necessary.
         """
-        event = EventWithDelay(time, delay, priority, action, argument)
+        event = EventWithDelay(time, delay, priority, action, argument, cost)
         heapq.heappush(self._queue, event)
         return event # The ID
 
-    def enterabs(self, time, priority, action, argument):
+    def enterabs(self, time, priority, action, argument, cost=0):
         """Enter a new event in the queue at an absolute time.
 
+        `cost` is the expected number of seconds the action takes.
+
         Returns an ID for the event which can be used to remove it,
         if necessary.
         """
         return self._enterabs(time, time - self.timefunc(),
-                              priority, action, argument)
+                              priority, action, argument, cost)
 
-    def enter(self, delay, priority, action, argument):
+    def enter(self, delay, priority, action, argument, cost=0):
         """A variant that specifies the time as a relative time.
 
         This is actually the more commonly used interface.
         """
         time = self.timefunc() + delay
-        return self._enterabs(time, delay, priority, action, argument)
+        return self._enterabs(time, delay, priority, action, argument, cost)
 
     def run(self):
-        """Execute the first event in the queue and add it again.
+        """Execute the due events in the queue and add them again.
 
         When there is a positive delay until the first event, the
         delay function is called and the event is left in the queue;
-        otherwise, the event is removed from the queue and executed
-        (its action function is called, passing it the argument).
-        Then the event is added again to the queue. If
+        otherwise, all due events are removed from the queue and
+        executed by priority within the budget (their action functions
+        are called, passing them the argument). Then the executed events
+        are added again to the queue, deferred ones are put back
+        unchanged, and `frame_action` is called. If
         the delay function returns prematurely, it is simply
         restarted.
         """
@@ -108,15 +155,40 @@ class ContScheduler(sched.scheduler):
         q = self._queue
         delayfunc = self.delayfunc
         timefunc = self.timefunc
+        budget = self.budget
         pop = heapq.heappop
         push = heapq.heappush
         while q:
-            time, delay, priority, action, argument = q[0]
             now = timefunc()
-            if now < time:
-                delayfunc(time - now)
-            else:
-                event = pop(q)
-                action(*argument)
-                # add the event again
-                self.enter(delay, priority, action, argument)
+            if now < q[0].time:
+                delayfunc(q[0].time - now)
+                continue
+            due = []
+            while q and q[0].time <= now:
+                due.append(pop(q))
+            due.sort(key=lambda event: event.priority)
+            spent = 0
+            for n, event in enumerate(due):
+                if budget is not None and n and \
+                        spent + event.cost > budget:
+                    for deferred in due[n:]:
+                        self.deferrals.append(Deferral(
+                            now, deferred.priority, deferred.action,
+                            deferred.argument))
+                        self.deferred += 1
+                        push(q, deferred)
+                    break
+                start = timefunc()
+                event.action(*event.argument)
+                end = timefunc()
+                spent += end - start
+                # Add the event again relative to its due time, so events
+                # with the same delay stay in the same frames. Periods
+                # which have already passed are skipped.
+                time = event.time + event.delay
+                if time < end and event.delay > 0:
+                    time += ((end - time) // event.delay + 1) * event.delay
+                self._enterabs(time, event.delay, event.priority,
+                               event.action, event.argument, event.cost)
+            if self.frame_action is not None:
+                self.frame_action()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+import unittest
+import tempfile
+import shutil
+
+from feeddzen.plugins import battery
+
+
+BAT0 = '''POWER_SUPPLY_NAME=BAT0
+POWER_SUPPLY_STATUS=Discharging
+POWER_SUPPLY_PRESENT=1
+POWER_SUPPLY_VOLTAGE_NOW=12000000
+POWER_SUPPLY_POWER_NOW=10000000
+POWER_SUPPLY_ENERGY_FULL_DESIGN=50000000
+POWER_SUPPLY_ENERGY_FULL=40000000
+POWER_SUPPLY_ENERGY_NOW=20000000
+'''
+
+BAT1 = '''POWER_SUPPLY_NAME=BAT1
+POWER_SUPPLY_STATUS=Discharging
+POWER_SUPPLY_PRESENT=1
+POWER_SUPPLY_VOLTAGE_NOW=10000000
+POWER_SUPPLY_CURRENT_NOW=500000
+POWER_SUPPLY_CHARGE_FULL_DESIGN=5000000
+POWER_SUPPLY_CHARGE_FULL=4000000
+POWER_SUPPLY_CHARGE_NOW=1000000
+'''
+
+
+class MultiBatteryWidgetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.add_supply('AC', 'Mains', online='0\n')
+        self.add_supply('BAT0', 'Battery', uevent=BAT0)
+        self.index = battery.PowerSupplyIndex(self.path)
+        self.widget = battery.MultiBatteryWidget(
+            0, lambda state, d: (state, d), full_design=False,
+            time_as_string=False, power_supply=self.index)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def add_supply(self, name, supply_type, **files):
+        os.mkdir(os.path.join(self.path, name))
+        files['type'] = supply_type + '\n'
+        for file_name, content in files.items():
+            self.write_file(name, file_name, content)
+
+    def write_file(self, name, file_name, content):
+        with open(os.path.join(self.path, name, file_name), 'w') as f:
+            f.write(content)
+
+    def test_index_is_cached(self):
+        self.assertEqual(self.index.batteries, ['BAT0'])
+        self.assertEqual(self.index.adapters, ['AC'])
+        # Types are not read again while the same devices are present.
+        with open(os.path.join(self.path, 'AC', 'type'), 'w') as f:
+            f.write('Battery\n')
+        self.assertEqual(self.index.adapters, ['AC'])
+        self.index.hotplug()
+        self.assertEqual(self.index.adapters, [])
+
+    def test_index_is_rebuilt_after_addition(self):
+        self.assertEqual(self.index.batteries, ['BAT0'])
+        self.add_supply('BAT1', 'Battery', uevent=BAT1)
+        self.assertEqual(self.index.batteries, ['BAT0', 'BAT1'])
+        self.assertEqual(len(self.index.read()[0]), 2)
+
+    def test_index_is_rebuilt_after_removal(self):
+        self.assertEqual(self.index.batteries, ['BAT0'])
+        shutil.rmtree(os.path.join(self.path, 'BAT0'))
+        self.assertEqual(self.index.read(), ([], [False]))
+
+    def test_combined(self):
+        self.add_supply('BAT1', 'Battery', uevent=BAT1)
+        state, d = self.widget.update()
+        self.assertEqual(state, 'discharging')
+        # BAT1: 10 Wh of 40 Wh, 5 W.
+        self.assertEqual(d['percentage'], 37.5)
+        self.assertEqual(d['rate'], 15.0)
+        self.assertEqual(d['batteries'], 2)
+        self.assertFalse(d['ac'])
+        # 30 Wh / 15 W = 2 hours
+        self.assertEqual((d['hours'], d['minutes'], d['seconds']), (2, 0, 0))
+
+    def test_combined_charging(self):
+        self.write_file('BAT0', 'uevent',
+                        BAT0.replace('Discharging', 'Charging'))
+        self.write_file('AC', 'online', '1\n')
+        # An idle battery doesn't contribute to the rate.
+        self.add_supply('BAT1', 'Battery',
+                        uevent=BAT1.replace('Discharging', 'Unknown'))
+        state, d = self.widget.update()
+        self.assertEqual(state, 'charging')
+        self.assertEqual(d['percentage'], 37.5)
+        self.assertEqual(d['rate'], 10.0)
+        self.assertTrue(d['ac'])
+        # Time to charge both batteries: (80 Wh - 30 Wh) / 10 W = 5 hours
+        self.assertEqual((d['hours'], d['minutes'], d['seconds']), (5, 0, 0))
+
+    def test_unknown_rate(self):
+        self.write_file('BAT0', 'uevent',
+                        BAT0.replace('POWER_SUPPLY_POWER_NOW', 'X'))
+        state, d = self.widget.update()
+        self.assertEqual(state, 'discharging')
+        self.assertEqual(d['percentage'], 50.0)
+        self.assertIsNone(d['rate'])
+        self.assertNotIn('hours', d)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+import unittest
+
+import feeddzen.utils
+
+
+class Stop(Exception):
+    pass
+
+
+class ContSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.executed = []
+        self.frames = []
+        self.frame_times = []
+
+    def timefunc(self):
+        return self.now
+
+    def delayfunc(self, seconds):
+        self.now += seconds
+
+    def action(self, name, seconds):
+        # Pretend the action takes `seconds`.
+        self.now += seconds
+        self.executed.append(name)
+
+    def frame_action(self):
+        self.frames.append(list(self.executed))
+        self.frame_times.append(self.now)
+        self.executed = []
+        if len(self.frames) == 3:
+            raise Stop
+
+    def run_scheduler(self, budget):
+        scheduler = feeddzen.utils.ContScheduler(
+            self.timefunc, self.delayfunc, budget=budget,
+            frame_action=self.frame_action)
+        scheduler.enter(10, 2, self.action, ('slow', 1.0), 1.0)
+        scheduler.enter(10, 3, self.action, ('slower', 2.0), 2.0)
+        scheduler.enter(10, 1, self.action, ('clock', 0.0), 0.0)
+        with self.assertRaises(Stop):
+            scheduler.run()
+        return scheduler
+
+    def test_missed_periods_are_skipped(self):
+        scheduler = feeddzen.utils.ContScheduler(
+            self.timefunc, self.delayfunc, frame_action=self.frame_action)
+        scheduler.enter(10, 1, self.action, ('slow', 25.0))
+        with self.assertRaises(Stop):
+            scheduler.run()
+        # Due at 10, finished at 35, so 20 and 30 are skipped.
+        self.assertEqual(self.frame_times, [35.0, 65.0, 95.0])
+
+    def test_priority(self):
+        scheduler = self.run_scheduler(None)
+        self.assertEqual(self.frames[0], ['clock', 'slow', 'slower'])
+        self.assertEqual(scheduler.deferred, 0)
+
+    def test_budget(self):
+        scheduler = self.run_scheduler(1.5)
+        self.assertEqual(self.frames, [['clock', 'slow'], ['slower'],
+                                       ['clock', 'slow']])
+        # Events are added again relative to their due time, so the
+        # deferral and actions' duration don't shift later frames.
+        self.assertEqual(self.frame_times, [11.0, 13.0, 21.0])
+        self.assertEqual(scheduler.deferred, 2)
+        deferral = scheduler.deferrals[0]
+        self.assertEqual(deferral.time, 10.0)
+        self.assertEqual(deferral.argument, ('slower', 2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
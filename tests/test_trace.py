@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+import unittest
+import io
+import tempfile
+import shutil
+
+import feeddzen.trace
+
+
+class TraceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'trace')
+        recorder = feeddzen.trace.TraceRecorder(self.path)
+        recorder.record(10.0, [(0, 0.5, 'load'), (1, None, ' | '),
+                               (2, 0.25, '12:00')])
+        recorder.record(40.0, [(0, 0.125, None)])
+        recorder.record(70.0, [(2, 1.0, '12:01')])
+        recorder.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_trace(self):
+        frames = list(feeddzen.trace.read_trace(self.path))
+        self.assertEqual([f.time for f in frames], [10.0, 40.0, 70.0])
+        self.assertEqual(frames[1].entries,
+                         [feeddzen.trace.Entry(0, 0.125, None)])
+        self.assertEqual(frames[2].entries[0].text, '12:01')
+        self.assertIsNone(frames[0].entries[1].latency)
+
+    def test_sessions(self):
+        # The second run starts 1000 seconds later.
+        recorder = feeddzen.trace.TraceRecorder(self.path)
+        recorder.record(1070.0, [(0, 0.5, 'load'), (1, None, ' | '),
+                                 (2, 0.25, '12:17')])
+        recorder.record(1100.0, [(0, 0.125, None)])
+        recorder.close()
+        frames = list(feeddzen.trace.read_trace(self.path))
+        self.assertEqual([f.new_session for f in frames],
+                         [True, False, False, True, False])
+        sessions = list(feeddzen.trace.split_sessions(frames))
+        self.assertEqual([len(session) for session in sessions], [3, 2])
+        summary = feeddzen.trace.summarize(frames)
+        self.assertEqual(summary.frames, 5)
+        self.assertEqual(summary.duration, 90.0)
+        self.assertEqual(summary.redundant_frames, 2)
+        with self.assertRaises(ValueError):
+            feeddzen.trace.replay(frames, io.BytesIO())
+        stream = io.BytesIO()
+        feeddzen.trace.replay(sessions[1], stream)
+        self.assertEqual(stream.getvalue().decode('utf-8').splitlines(),
+                         ['load | 12:17', 'load | 12:17'])
+
+    def test_read_truncated_trace(self):
+        with open(self.path, 'rb+') as file_obj:
+            file_obj.truncate(os.path.getsize(self.path) - 2)
+        frames = list(feeddzen.trace.read_trace(self.path))
+        self.assertEqual(len(frames), 2)
+
+    def test_append_after_truncation(self):
+        with open(self.path, 'rb+') as file_obj:
+            file_obj.truncate(os.path.getsize(self.path) - 3)
+        recorder = feeddzen.trace.TraceRecorder(self.path)
+        recorder.record(100.0, [(0, 0.5, 'new')])
+        recorder.record(130.0, [(0, 0.5, None)])
+        recorder.close()
+        frames = list(feeddzen.trace.read_trace(self.path))
+        self.assertEqual([f.time for f in frames], [10.0, 40.0, 100.0, 130.0])
+        self.assertEqual(frames[2].entries,
+                         [feeddzen.trace.Entry(0, 0.5, 'new')])
+
+    def test_recorder_keeps_other_files(self):
+        path = os.path.join(self.directory, 'other')
+        for content in (b'abc', b'FDZX', b'not a trace'):
+            with open(path, 'wb') as file_obj:
+                file_obj.write(content)
+            with self.assertRaises(ValueError):
+                feeddzen.trace.TraceRecorder(path)
+            with open(path, 'rb') as file_obj:
+                self.assertEqual(file_obj.read(), content)
+
+    def test_recorder_after_partial_header(self):
+        with open(self.path, 'wb') as file_obj:
+            file_obj.write(b'FDZ')
+        recorder = feeddzen.trace.TraceRecorder(self.path)
+        recorder.record(1.0, [(0, 0.5, 'new')])
+        recorder.close()
+        self.assertEqual(len(list(feeddzen.trace.read_trace(self.path))), 1)
+
+    def test_replay(self):
+        stream = io.BytesIO()
+        scheduler = feeddzen.trace.replay(
+            feeddzen.trace.read_trace(self.path), stream)
+        self.assertEqual(stream.getvalue().decode('utf-8').splitlines(),
+                         ['load | 12:00', 'load | 12:00', 'load | 12:01'])
+        # Recorded latencies move the clock: 10 + 0.5 + 0.25 + 60 + 1.0
+        self.assertEqual(scheduler.timefunc(), 71.75)
+
+    def test_replay_with_budget(self):
+        Frame = feeddzen.trace.Frame
+        Entry = feeddzen.trace.Entry
+        # Two widgets refreshed every 10 seconds, each takes 1 second.
+        frames = [Frame(t, [Entry(0, 1.0, 'a{}'.format(t)),
+                            Entry(1, 1.0, 'b{}'.format(t))])
+                  for t in (0.0, 10.0, 20.0)]
+        stream = io.BytesIO()
+        scheduler = feeddzen.trace.replay(frames, stream, budget=1.5,
+                                          priorities={1: 0})
+        # Both widgets are due at 12 and 22, the second one has higher
+        # priority.
+        self.assertEqual(scheduler.deferred, 2)
+        self.assertTrue(all(deferral.argument == (0,)
+                            for deferral in scheduler.deferrals))
+        self.assertEqual(stream.getvalue().decode('utf-8').splitlines(),
+                         ['a0.0b0.0', 'a0.0b10.0', 'a10.0b10.0',
+                          'a10.0b20.0', 'a20.0b20.0'])
+
+    def test_summarize(self):
+        summary = feeddzen.trace.summarize(
+            feeddzen.trace.read_trace(self.path))
+        self.assertEqual(summary.frames, 3)
+        self.assertEqual(summary.duration, 60.0)
+        self.assertEqual(summary.frames_per_minute, 3.0)
+        self.assertEqual(summary.redundant_frames, 1)
+        self.assertEqual(summary.latency[50], 0.25)
+        self.assertEqual(summary.latency[100], 1.0)
+        # The separator's latency is not counted.
+        summary = feeddzen.trace.summarize(
+            feeddzen.trace.read_trace(self.path), percentiles=(1,))
+        self.assertEqual(summary.latency[1], 0.125)
+
+
+if __name__ == '__main__':
+    unittest.main()